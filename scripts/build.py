@@ -6,22 +6,35 @@ Compiles kernel, out-of-tree modules, and creates deployment tarball.
 """
 
 import argparse
+import filecmp
+import hashlib
+import json
 import logging
 import os
 import subprocess
 import sys
 import tarfile
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Tuple
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 __version__ = "0.2.2"
 
 DEFAULT_KERNEL_VERSION = '6.18.3'
 DEFAULT_PKGREL = 1
 
+# Seconds between progress lines while quietly streaming a long command
+PROGRESS_INTERVAL = 30
+
 
 # ANSI color codes for terminal output
 class Colors:
@@ -43,17 +56,43 @@ class BuildConfig:
     dtb_file: Path
     output_tar: Path
     log_file: Path
+    patch_cache: Path
     jobs: int
+    jobs_build: int
+    jobs_io: int
+    jobs_local: int
     pkgrel: int
+    legacy_gzip: bool = False
+    verbose: bool = False
+    distcc: bool = False
 
     @classmethod
-    def create(cls, version: str, build_dir: Optional[Path] = None, jobs: Optional[int] = None, pkgrel: Optional[int] = None):
+    def create(cls, version: str, build_dir: Optional[Path] = None, jobs: Optional[int] = None, pkgrel: Optional[int] = None,
+               legacy_gzip: bool = False, verbose: bool = False, distcc: bool = False):
         """Create build configuration with sensible defaults."""
         if build_dir is None:
             build_dir = Path.home() / "mnt-build"
 
-        if jobs is None:
-            jobs = os.cpu_count() or 4
+        # With distcc, run as many jobs as the distcc hosts have slots
+        jobs_local = None
+        if jobs is None and distcc:
+            jobs = distcc_slots(os.environ.get('DISTCC_HOSTS', '')) or None
+            # The slot total is remote capacity, local-only work uses the local CPUs
+            if jobs is not None:
+                jobs_local = usable_cpus()
+
+        auto_jobs = jobs is None
+        if auto_jobs:
+            jobs = usable_cpus()
+
+        if jobs_local is None:
+            jobs_local = jobs
+
+        # The compile waits on I/O and takes some oversubscription of the
+        # detected CPUs. An explicit -j or a distcc slot total is used as given.
+        # modules_install is plain file copying and gets fewer jobs.
+        jobs_build = int(jobs * 1.5) if auto_jobs else jobs
+        jobs_io = max(1, jobs_local // 2)
 
         if pkgrel is None:
             pkgrel = DEFAULT_PKGREL
@@ -65,6 +104,9 @@ class BuildConfig:
         version_parts = version.split('.')
         major_minor = f"{version_parts[0]}.{version_parts[1]}"
 
+        # zstd by default, gzip only when asked for compatibility
+        tar_suffix = "tar.gz" if legacy_gzip else "tar.zst"
+
         return cls(
                 version=version,
                 build_dir=build_dir,
@@ -73,13 +115,43 @@ class BuildConfig:
                 patches_dir=build_dir / "patch-linux",
                 config_file=build_dir / "configs" / f"config-{version}-mnt-reform-arm64",
                 dtb_file=linux_dir / "arch/arm64/boot/dts/freescale/imx8mp-mnt-pocket-reform.dtb",
-                output_tar=linux_dir / f"kernel-{version}-{pkgrel}-mnt.tar.gz",
+                output_tar=build_dir / f"kernel-{version}-{pkgrel}-mnt.{tar_suffix}",
                 log_file=build_dir / f"build-{version}-{timestamp}.log",
+                patch_cache=build_dir / ".patch_cache.json",
                 jobs=jobs,
-                pkgrel=pkgrel
+                jobs_build=jobs_build,
+                jobs_io=jobs_io,
+                jobs_local=jobs_local,
+                pkgrel=pkgrel,
+                legacy_gzip=legacy_gzip,
+                verbose=verbose,
+                distcc=distcc
                 )
 
 
+def usable_cpus() -> int:
+    """CPUs this process may run on, honouring cgroup cpusets and affinity masks."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 4
+
+
+def distcc_slots(hosts: str) -> int:
+    """Count the job slots in a DISTCC_HOSTS string (HOST[:PORT][/LIMIT][,OPTIONS] ...)."""
+    slots = 0
+    for spec in hosts.split():
+        if spec.startswith('--'):
+            continue
+        host, _, limit = spec.split(',')[0].partition('/')
+        if limit.isdigit():
+            slots += int(limit)
+        else:
+            # distcc's defaults: 2 jobs on localhost, 4 on other hosts
+            slots += 2 if host == 'localhost' else 4
+    return slots
+
+
 class ColoredFormatter(logging.Formatter):
     """Custom formatter with colors for different log levels."""
 
@@ -91,9 +163,18 @@ class ColoredFormatter(logging.Formatter):
             logging.CRITICAL: f"{Colors.RED}[CRITICAL]{Colors.RESET} %(asctime)s - %(message)s",
             }
 
+    def __init__(self):
+        super().__init__()
+        # Build one formatter per level up front instead of one per record
+        self._formatters = {
+                level: logging.Formatter(fmt, datefmt='%Y-%m-%d %H:%M:%S')
+                for level, fmt in self.FORMATS.items()
+                }
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt, datefmt='%Y-%m-%d %H:%M:%S')
+        formatter = self._formatters.get(record.levelno)
+        if formatter is None:
+            return super().format(record)
         return formatter.format(record)
 
 
@@ -128,22 +209,43 @@ class BuildError(Exception):
 
 class PatchStats:
     """Track patch application statistics."""
-    def __init__(self):
+    def __init__(self, failed_log_path: Optional[Path] = None):
         self.success = 0
         self.failed = 0
+        self.skipped = 0
         self.failed_patches = []
+        self.applied_digests = []
+        self.failed_log_path = failed_log_path
+        self._failed_log = None
 
     @property
     def total(self) -> int:
-        return self.success + self.failed
+        return self.success + self.failed + self.skipped
 
-    def add_success(self):
+    def add_success(self, digest: str):
         self.success += 1
+        self.applied_digests.append(digest)
+
+    def add_skipped(self, digest: str):
+        self.skipped += 1
+        self.applied_digests.append(digest)
 
-    def add_failure(self, patch_name: str):
+    def add_failure(self, patch_name: str, details: str = ''):
         self.failed += 1
         self.failed_patches.append(patch_name)
 
+        # Write each failure out as it happens, the log is only created if needed
+        if self.failed_log_path is not None:
+            if self._failed_log is None:
+                self._failed_log = open(self.failed_log_path, 'w')
+            self._failed_log.write(details + '\n')
+            self._failed_log.flush()
+
+    def close(self):
+        if self._failed_log is not None:
+            self._failed_log.close()
+            self._failed_log = None
+
 
 class KernelBuilder:
     """Handles kernel and module building."""
@@ -154,11 +256,53 @@ class KernelBuilder:
         self.arch = "arm64"
         self.cross_compile = "aarch64-linux-gnu-"
 
+        # Streamed command output goes through one buffered handle for the whole build
+        self._logfile = open(config.log_file, 'ab', buffering=65536)
+
+        # Use ccache for every compile when it is installed
+        self.env = os.environ.copy()
+        self.ccache = shutil.which('ccache') is not None
+        if self.ccache:
+            self.env.update({
+                'CCACHE_DIR': str(config.build_dir / ".ccache"),
+                'CCACHE_BASEDIR': str(config.build_dir),
+                'CCACHE_MAXSIZE': '20G',
+                })
+
+    def close(self):
+        """Close the build log handle."""
+        if not self._logfile.closed:
+            self._logfile.close()
+
+    def _compiler_vars(self) -> List[str]:
+        """Make variables overriding the compilers, empty without ccache or distcc.
+
+        Only CC goes through distcc. Host tools such as fixdep and modpost have
+        to be built by the local gcc, not by whatever gcc the distcc hosts run.
+        """
+        cc = f'{self.cross_compile}gcc'
+        if self.config.distcc:
+            cc = f'distcc {cc}'
+        if self.ccache:
+            return [f'CC=ccache {cc}', 'HOSTCC=ccache gcc']
+        if self.config.distcc:
+            return [f'CC={cc}']
+        return []
+
+    def _make_vars(self) -> List[str]:
+        """Make variables shared by every kernel and module make invocation."""
+        return [f'ARCH={self.arch}', f'CROSS_COMPILE={self.cross_compile}', *self._compiler_vars()]
+
     def run_command(self, cmd: List[str], cwd: Optional[Path] = None,
-                    check: bool = True, input_data: Optional[str] = None,
-                    stream_output: bool = False) -> subprocess.CompletedProcess:
-        """Run a shell command. If stream_output is True, stream stdout/stderr live to logger and file."""
-        cwd = cwd or Path.cwd()
+                    check: bool = True, stream_output: bool = False, env: Optional[dict] = None,
+                    quiet: bool = False) -> subprocess.CompletedProcess:
+        """Run a shell command. If stream_output is True, stream stdout/stderr live to logger and file.
+
+        With quiet=True the streamed output only goes to the log file, and the
+        console gets a progress line every PROGRESS_INTERVAL seconds instead.
+        """
+        cwd = cwd or self.config.build_dir
+        env = env or self.env
         self.logger.debug(f"Running: {' '.join(cmd)} (in {cwd})")
 
         if not stream_output:
@@ -169,7 +313,7 @@ class KernelBuilder:
                         capture_output=True,
                         text=True,
                         check=check,
-                        input=input_data
+                        env=env
                         )
                 if result.stdout:
                     self.logger.debug(f"stdout: {result.stdout.strip()}")
@@ -183,37 +327,54 @@ class KernelBuilder:
                 self.logger.error(f"stderr: {e.stderr}")
                 raise BuildError(f"Command failed: {' '.join(cmd)}") from e
 
-        # stream_output == True: use Popen and stream lines to logger + file
-        logfile_path = Path(self.config.log_file)
-        with open(logfile_path, "a", buffering=1) as logfile:
-            proc = subprocess.Popen(
-                    cmd,
-                    cwd=cwd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    stdin=subprocess.PIPE if input_data is not None else None,
-                    text=True,
-                    bufsize=1,
-                    universal_newlines=True
-                    )
-
-            # If input_data is provided, send it and close stdin
-            if input_data is not None:
-                try:
-                    proc.stdin.write(input_data)
-                    proc.stdin.close()
-                except Exception:
-                    pass
-
-            # Stream output line by line
-            assert proc.stdout is not None
-            for line in iter(proc.stdout.readline, ''):
-                # strip trailing newline only for logging
-                self.logger.info(line.rstrip())
-                logfile.write(line)
+        # stream_output == True: read the pipe in large blocks rather than line by line,
+        # write them to the file as-is and only split lines for the logger
+        proc = subprocess.Popen(
+                cmd,
+                cwd=cwd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=env
+                )
 
-            proc.wait()
-            ret = proc.returncode
+        assert proc.stdout is not None
+        fd = proc.stdout.fileno()
+        pending = b''
+        start = last_report = time.monotonic()
+        line_count = 0
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            self._logfile.write(chunk)
+
+            if quiet:
+                # Keep the tail around in case the command fails
+                pending = (pending + chunk)[-8192:]
+                line_count += chunk.count(b'\n')
+                now = time.monotonic()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    self.logger.info(f"... {now - start:.0f}s elapsed, {line_count} lines logged")
+                    last_report = now
+                continue
+
+            # Keep a trailing partial line for the next block
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                self.logger.info(line.decode(errors='replace').rstrip())
+
+        proc.stdout.close()
+        ret = proc.wait()
+        self._logfile.flush()
+
+        if quiet:
+            # Show the end of the output on failure, it is not on the console
+            if ret != 0:
+                for line in pending.decode(errors='replace').splitlines()[-20:]:
+                    self.logger.error(line)
+        elif pending:
+            self.logger.info(pending.decode(errors='replace').rstrip())
 
         if ret != 0 and check:
             raise BuildError(f"Command failed (exit {ret}): {' '.join(cmd)}")
@@ -228,12 +389,7 @@ class KernelBuilder:
         self.logger.info("Checking prerequisites...")
 
         required_tools = ['git', 'make', 'tar', 'aarch64-linux-gnu-gcc', 'patch']
-        missing_tools = []
-
-        for tool in required_tools:
-            result = self.run_command(['which', tool], check=False)
-            if result.returncode != 0:
-                missing_tools.append(tool)
+        missing_tools = [tool for tool in required_tools if shutil.which(tool) is None]
 
         if missing_tools:
             raise BuildError(f"Missing required tools: {', '.join(missing_tools)}")
@@ -244,6 +400,17 @@ class KernelBuilder:
         if not self.config.patches_dir.exists():
             raise BuildError(f"Patches directory not found: {self.config.patches_dir}")
 
+        # Fail now rather than after the whole build when the tarball can't be compressed
+        if not self.config.legacy_gzip and shutil.which('zstd') is None and zstandard is None:
+            raise BuildError("No zstd compressor found: install zstd or python-zstandard, "
+                             "or pass --legacy-gzip")
+
+        if self.config.distcc:
+            if shutil.which('distcc') is None:
+                raise BuildError("--distcc requires distcc to be installed")
+            if not self.env.get('DISTCC_HOSTS'):
+                raise BuildError("--distcc requires DISTCC_HOSTS to be set")
+
         self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} Prerequisites check passed")
 
     def apply_patches(self) -> PatchStats:
@@ -259,62 +426,60 @@ class KernelBuilder:
 
         self.logger.info(f"Found {len(patch_files)} patches to apply")
 
-        stats = PatchStats()
         failed_log_path = self.config.linux_dir / "failed.log"
 
         # Remove old failed.log if it exists
         if failed_log_path.exists():
             failed_log_path.unlink()
 
-        failed_log_entries = []
+        stats = PatchStats(failed_log_path)
 
-        for patch_file in patch_files:
-            patch_name = patch_file.name
-            self.logger.debug(f"Processing patch: {patch_name}")
+        # Patches recorded against the current HEAD were committed by a previous run
+        already_applied = self._load_patch_cache()
 
-            # Read patch content
-            with open(patch_file, 'r') as f:
-                patch_content = f.read()
+        try:
+            for patch_file in patch_files:
+                patch_name = patch_file.name
+                self.logger.debug(f"Processing patch: {patch_name}")
 
-            # Try dry-run first
-            dry_run_result = self.run_command(
-                    ['patch', '-p1', '--dry-run'],
-                    cwd=self.config.linux_dir,
-                    input_data=patch_content,
-                    check=False
-                    )
+                digest = hashlib.sha256(patch_file.read_bytes()).hexdigest()
+                if digest in already_applied:
+                    self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} Already applied: {patch_name}")
+                    stats.add_skipped(digest)
+                    continue
 
-            if dry_run_result.returncode == 0:
-                # Apply the patch for real
+                # git apply is atomic, so a separate --check pass is not needed:
+                # the patch either applies cleanly or the tree is left untouched
                 apply_result = self.run_command(
-                        ['patch', '-p1'],
+                        ['git', 'apply', str(patch_file)],
                         cwd=self.config.linux_dir,
-                        input_data=patch_content,
                         check=False
                         )
 
                 if apply_result.returncode == 0:
                     self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} Applied: {patch_name}")
-                    stats.add_success()
+                    stats.add_success(digest)
+                    continue
+
+                # git apply allows no context fuzz, patch -p1 does. Fall back to
+                # it so patches with drifted context still apply as they used to
+                apply_result = self._apply_with_fuzz(patch_file)
+
+                if apply_result.returncode == 0:
+                    self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} Applied (with fuzz): {patch_name}")
+                    stats.add_success(digest)
                 else:
                     self.logger.warning(f"{Colors.RED}✗{Colors.RESET} Failed to apply: {patch_name}")
-                    stats.add_failure(patch_name)
-                    failed_log_entries.append(self._format_failed_patch(patch_name, apply_result))
-            else:
-                self.logger.warning(f"{Colors.RED}✗{Colors.RESET} Failed (dry-run): {patch_name}")
-                stats.add_failure(patch_name)
-                failed_log_entries.append(self._format_failed_patch(patch_name, dry_run_result))
-
-        # Write failed patches log if there were failures
-        if failed_log_entries:
-            with open(failed_log_path, 'w') as f:
-                f.write('\n'.join(failed_log_entries))
+                    stats.add_failure(patch_name, self._format_failed_patch(patch_name, apply_result))
+        finally:
+            stats.close()
 
         # Summary
         self.logger.info("")
         self.logger.info("Patch application complete!")
         self.logger.info(f"Succeeded: {stats.success}")
         self.logger.info(f"Failed:    {stats.failed}")
+        self.logger.info(f"Skipped:   {stats.skipped}")
         self.logger.info(f"Total:     {stats.total}")
 
         if stats.failed > 0:
@@ -322,6 +487,47 @@ class KernelBuilder:
 
         return stats
 
+    def _apply_with_fuzz(self, patch_file: Path) -> subprocess.CompletedProcess:
+        """Apply a patch with patch -p1, after a dry run so a failure leaves the tree untouched."""
+        patch_cmd = ['patch', '-p1', '--no-backup-if-mismatch', '-i', str(patch_file)]
+
+        dry_run_result = self.run_command(
+                [*patch_cmd, '--dry-run'],
+                cwd=self.config.linux_dir,
+                check=False
+                )
+        if dry_run_result.returncode != 0:
+            return dry_run_result
+
+        return self.run_command(
+                patch_cmd,
+                cwd=self.config.linux_dir,
+                check=False
+                )
+
+    def _git_head(self) -> Optional[str]:
+        """Return the commit checked out in the kernel tree."""
+        result = self.run_command(['git', 'rev-parse', 'HEAD'], cwd=self.config.linux_dir, check=False)
+        if result.returncode != 0:
+            return None
+        return result.stdout.strip()
+
+    def _load_patch_cache(self) -> set:
+        """Return digests of the patches already committed at the current HEAD."""
+        try:
+            cache = json.loads(self.config.patch_cache.read_text())
+        except (OSError, ValueError):
+            return set()
+
+        if cache.get('head') != self._git_head():
+            return set()
+        return set(cache.get('patches', []))
+
+    def _save_patch_cache(self, digests: List[str]):
+        """Record the patches contained in the current HEAD."""
+        cache = {'head': self._git_head(), 'patches': sorted(digests)}
+        self.config.patch_cache.write_text(json.dumps(cache, indent=2))
+
     def _format_failed_patch(self, patch_name: str, result: subprocess.CompletedProcess) -> str:
         """Format a failed patch entry for the log file."""
         return (
@@ -342,27 +548,25 @@ class KernelBuilder:
         self.logger.info(f"Building kernel {self.config.version}...")
         start_time = datetime.now()
 
-        os.chdir(self.config.linux_dir)
-
         if not skip_git_operations:
             # Reset repository
             self.logger.info("Resetting repository state...")
-            self.run_command(['git', 'reset', '--hard', 'HEAD'])
-            self.run_command(['git', 'clean', '-fd'])
-            self.run_command(['git', 'checkout', 'master'])
-            self.run_command(['git', 'tag', '-d', f'v{self.config.version}'], check=False)
+            self.run_command(['git', 'reset', '--hard', 'HEAD'], cwd=self.config.linux_dir)
+            self.run_command(['git', 'clean', '-fd'], cwd=self.config.linux_dir)
+            self.run_command(['git', 'checkout', 'master'], cwd=self.config.linux_dir)
+            self.run_command(['git', 'tag', '-d', f'v{self.config.version}'], cwd=self.config.linux_dir, check=False)
 
             # Fetch tags
             self.logger.info("Fetching git tags...")
-            self.run_command(['git', 'fetch', '--tags'])
+            self.run_command(['git', 'fetch', '--tags'], cwd=self.config.linux_dir)
 
             # Checkout version
             branch_name = f"pocket-reform-{self.config.version}"
             self.logger.info(f"Checking out kernel version v{self.config.version}...")
 
             # Delete branch if it exists
-            self.run_command(['git', 'branch', '-D', branch_name], check=False)
-            self.run_command(['git', 'checkout', '-b', branch_name, f'tags/v{self.config.version}'])
+            self.run_command(['git', 'branch', '-D', branch_name], cwd=self.config.linux_dir, check=False)
+            self.run_command(['git', 'checkout', '-b', branch_name, f'tags/v{self.config.version}'], cwd=self.config.linux_dir)
 
         # Apply patches
         patch_stats = self.apply_patches()
@@ -376,72 +580,132 @@ class KernelBuilder:
         self.logger.info("Adding custom DTS file...")
         custom_dts = self.config.build_dir / "reform-debian-packages/linux/imx8mp-mnt-pocket-reform.dts"
         dts_dest = self.config.linux_dir / "arch/arm64/boot/dts/freescale/imx8mp-mnt-pocket-reform.dts"
-        self.run_command(["cp", str(custom_dts), str(dts_dest)])
+        self._copy_if_changed(custom_dts, dts_dest)
 
-        # Update the Freescale Makefile for the DTB creation
+        # Update the Freescale Makefile for the DTB creation. Only append the
+        # line once, rewriting the Makefile on a warm tree makes kbuild redo work.
         self.logger.info("Modifying freescale dts makefile...")
         makefile = self.config.linux_dir / "arch/arm64/boot/dts/freescale/Makefile"
-        with open(makefile, "a") as f:
-            f.write("\ndtb-$(CONFIG_ARCH_MXC) += imx8mp-mnt-pocket-reform.dtb\n")
+        if b'imx8mp-mnt-pocket-reform.dtb' not in makefile.read_bytes():
+            with open(makefile, "a") as f:
+                f.write("\ndtb-$(CONFIG_ARCH_MXC) += imx8mp-mnt-pocket-reform.dtb\n")
+        else:
+            self.logger.info("Makefile already lists the Pocket Reform DTB")
 
         # Copy config
         self.logger.info("Copying kernel config...")
-        self.run_command(['cp', str(self.config.config_file), '.config'])
+        self._copy_if_changed(self.config.config_file, self.config.linux_dir / ".config")
 
-        # Commit changes
+        # Commit changes, a re-run on an already prepared tree has nothing to commit
         self.logger.info("Create git tag and commit.")
-        self.run_command(['git', 'add', '--all'])
-        self.run_command(['git', 'commit', '-s', '-m', f'MNT Pocket Arch {self.config.version}'])
-        self.run_command(['git', 'tag', '-d', f'v{self.config.version}'], check=False)
-        self.run_command(['git', 'tag', '-a', f'v{self.config.version}', '-m', f'MNT Pocket Arch {self.config.version}'])
+        self.run_command(['git', 'add', '--all'], cwd=self.config.linux_dir)
+        staged = self.run_command(['git', 'diff', '--cached', '--quiet'], cwd=self.config.linux_dir, check=False)
+        if staged.returncode != 0:
+            self.run_command(['git', 'commit', '-s', '-m', f'MNT Pocket Arch {self.config.version}'], cwd=self.config.linux_dir)
+        else:
+            self.logger.info("No changes to commit")
+        self._save_patch_cache(patch_stats.applied_digests)
+        self.run_command(['git', 'tag', '-d', f'v{self.config.version}'], cwd=self.config.linux_dir, check=False)
+        self.run_command(['git', 'tag', '-a', f'v{self.config.version}', '-m', f'MNT Pocket Arch {self.config.version}'], cwd=self.config.linux_dir)
 
         # Compile kernel
-        self.logger.info(f"Compiling kernel with {self.config.jobs} jobs (this may take a while)...")
+        self.logger.info(f"Compiling kernel with {self.config.jobs_build} jobs (this may take a while)...")
+        if not self.config.verbose:
+            self.logger.info(f"Compiler output goes to {self.config.log_file} (use --verbose to show it)")
         self.run_command(
                 [
                     'make',
-                    f'ARCH={self.arch}',
-                    f'CROSS_COMPILE={self.cross_compile}',
-                    f'-j{self.config.jobs}',
+                    *self._make_vars(),
+                    f'-j{self.config.jobs_build}',
                     'Image', 'modules', 'dtbs'
                     ],
                 cwd=self.config.linux_dir,
-                stream_output=True)
+                stream_output=True,
+                quiet=not self.config.verbose)
 
         elapsed = (datetime.now() - start_time).total_seconds()
         self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} Kernel compiled in {elapsed:.0f} seconds")
 
-        # Install modules
+        self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} Kernel build complete")
+
+    def _copy_if_changed(self, src: Path, dest: Path):
+        """Copy src over dest unless they already match, so dest keeps its mtime."""
+        if dest.exists() and filecmp.cmp(src, dest, shallow=False):
+            self.logger.debug(f"Unchanged, not copying: {dest}")
+            return
+        self.run_command(['cp', str(src), str(dest)], cwd=self.config.linux_dir)
+
+    def install_modules(self):
+        """Install the kernel modules into the modules staging directory."""
         self.logger.info("Installing modules...")
         modules_path = self.config.linux_dir / "modules"
+
+        # modules_install copies every module again even when nothing changed.
+        # Module.symvers and modules.order are rewritten whenever a module is
+        # rebuilt, so an install newer than both is still current.
+        release_file = self.config.linux_dir / "include/config/kernel.release"
+        if release_file.exists():
+            release = release_file.read_text().strip()
+            installed = modules_path / "lib/modules" / release / "modules.dep"
+            inputs = [self.config.linux_dir / "Module.symvers", self.config.linux_dir / "modules.order"]
+            if self._is_up_to_date(installed, inputs):
+                self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} Installed modules up to date, skipping install")
+                return
+
         self.run_command([
             'make',
-            f'ARCH={self.arch}',
-            f'CROSS_COMPILE={self.cross_compile}',
+            *self._make_vars(),
             'modules_install',
             f'INSTALL_MOD_PATH={modules_path}',
-            f'-j{self.config.jobs}'
-            ])
+            f'-j{self.config.jobs_io}'
+            ], cwd=self.config.linux_dir)
 
-        self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} Kernel build complete")
+        self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} Modules installed")
+
+    def _module_jobs(self) -> Tuple[int, int]:
+        """Jobs for the LPC and QCACLD2 builds, which run alongside modules_install.
+
+        The three budgets add up to about config.jobs.
+        """
+        remaining = self.config.jobs - self.config.jobs_io
+        # LPC is a single source file, QCACLD2 gets the bulk of the share
+        lpc_jobs = max(1, remaining // 4)
+        return lpc_jobs, max(1, remaining - lpc_jobs)
+
+    def _is_up_to_date(self, output: Path, inputs: List[Path]) -> bool:
+        """Check that output exists and is newer than all of its inputs."""
+        if not output.exists():
+            return False
+
+        output_mtime = output.stat().st_mtime
+        return all(path.stat().st_mtime <= output_mtime for path in inputs if path.exists())
+
+    def _module_is_up_to_date(self, module: Path, src_dir: Path) -> bool:
+        """Check that a built module is newer than its sources and the kernel's Module.symvers."""
+        inputs = [self.config.linux_dir / "Module.symvers"]
+        for pattern in ('*.c', '*.h', 'Makefile', 'Kbuild'):
+            inputs.extend(src_dir.rglob(pattern))
+
+        return self._is_up_to_date(module, inputs)
 
     def build_lpc_module(self):
         """Build the LPC module."""
         self.logger.info("Building LPC module...")
         lpc_dir = self.config.build_dir / "reform-tools" / "lpc"
 
-        os.chdir(lpc_dir)
+        if self._module_is_up_to_date(lpc_dir / "reform2_lpc.ko", lpc_dir):
+            self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} LPC module up to date, skipping build")
+            return
 
         # Build module
         self.logger.info("Compiling LPC module...")
         self.run_command([
             'make',
-            f'ARCH={self.arch}',
-            f'CROSS_COMPILE={self.cross_compile}',
+            *self._make_vars(),
             f'-C{self.config.linux_dir}',
             f'M={lpc_dir}',
-            f'-j{self.config.jobs}'
-            ])
+            f'-j{self._module_jobs()[0]}'
+            ], cwd=lpc_dir)
 
         # Verify output
         if not (lpc_dir / "reform2_lpc.ko").exists():
@@ -454,14 +718,25 @@ class KernelBuilder:
         self.logger.info("Building QCACLD2 WiFi module...")
         qcacld2_dir = self.config.build_dir / "qcacld2"
 
-        os.chdir(qcacld2_dir)
+        if self._module_is_up_to_date(qcacld2_dir / "wlan.ko", qcacld2_dir):
+            self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} QCACLD2 module up to date, skipping build")
+            return
+
+        # build.sh runs make itself, so hand its job share and the compiler
+        # override down via MAKEFLAGS
+        makeflags = ' '.join([
+                f'-j{self._module_jobs()[1]}',
+                *(v.replace(' ', '\\ ') for v in self._compiler_vars())
+                ])
+        env = dict(self.env, MAKEFLAGS=f"{self.env.get('MAKEFLAGS', '')} {makeflags}".strip())
 
         # Build module
         self.logger.info("Compiling QCACLD2 module...")
         self.run_command(
             ["bash", "./build.sh"],
             cwd=Path(qcacld2_dir),
-            stream_output=False
+            stream_output=False,
+            env=env
         )
 
         # Verify output
@@ -470,6 +745,84 @@ class KernelBuilder:
 
         self.logger.info(f"{Colors.GREEN}✓{Colors.RESET} QCACLD2 module built")
 
+    def _tarball_members(self) -> List[Tuple[Path, str]]:
+        """List the files and directories to archive, with their names in the tarball."""
+        return [
+                # Kernel image
+                (self.config.linux_dir / "arch/arm64/boot/Image", "arch/arm64/boot/Image"),
+                # DTB
+                (self.config.dtb_file, f"imx8mp-mnt-pocket-reform-{self.config.version}.dtb"),
+                # LPC module
+                (self.config.build_dir / "reform-tools/lpc/reform2_lpc.ko", "reform2_lpc.ko"),
+                # WiFi module
+                (self.config.build_dir / "qcacld2/wlan.ko", "wlan.ko"),
+                # WiFi firmware
+                (self.config.build_dir / "qcacld2/debian-meta/usr", "usr"),
+                # Atheros blacklist
+                (self.config.build_dir / "qcacld2/debian-meta/etc/modprobe.d/reform-qcacld2.conf",
+                 "etc/modprobe.d/reform-qcacld2.conf"),
+                # Modules directory
+                (self.config.linux_dir / "modules/lib/modules", "lib/modules"),
+                # The config file
+                (self.config.config_file, f"config-{self.config.version}-mnt-reform-arm64"),
+                ]
+
+    def _write_tarball_gnu(self, members: List[Tuple[Path, str]], compress_args: List[str]):
+        """Write the tarball with GNU tar, renaming members via --transform."""
+        def sed_escape(text: str, special: str) -> str:
+            return ''.join(f"\\{c}" if c in special else c for c in text)
+
+        modules_dir = self.config.linux_dir / "modules/lib/modules"
+        # '*' must not cross '/', or every 'build' at any depth under lib/modules goes
+        cmd = ['tar', *compress_args, '-cPf', str(self.config.output_tar),
+               '--no-wildcards-match-slash', f"--exclude={modules_dir}/*/build"]
+        for path, arcname in members:
+            pattern = sed_escape(str(path), '\\.*[]^$,')
+            replacement = sed_escape(arcname, '\\&,')
+            # 'S' keeps symlink targets untouched
+            cmd.append(f"--transform=s,^{pattern}\\(/\\|$\\),{replacement}\\1,S")
+        cmd.extend(str(path) for path, _ in members)
+
+        self.run_command(cmd, cwd=self.config.linux_dir)
+
+    def _write_tarball_piped(self, members: List[Tuple[Path, str]], compressor: List[str], tar_filter):
+        """Stream an uncompressed tar into an external compressor process."""
+        with open(self.config.output_tar, 'wb') as out:
+            self.logger.debug(f"Running: {' '.join(compressor)} > {self.config.output_tar}")
+            proc = subprocess.Popen(compressor, stdin=subprocess.PIPE, stdout=out)
+            try:
+                # 'w|' never seeks, so the stream flows straight into the pipe
+                with tarfile.open(fileobj=proc.stdin, mode='w|') as tar:
+                    for path, arcname in members:
+                        tar.add(path, arcname=arcname, filter=tar_filter)
+            finally:
+                proc.stdin.close()
+                ret = proc.wait()
+
+        if ret != 0:
+            raise BuildError(f"Command failed (exit {ret}): {' '.join(compressor)}")
+
+    def _parallel_gzip_command(self) -> Optional[List[str]]:
+        """Return a multithreaded gzip command (pigz or igzip) if one is installed."""
+        if shutil.which('pigz'):
+            return ['pigz', '-p', str(self.config.jobs_local), '-c']
+        if shutil.which('igzip'):
+            return ['igzip', '-T', str(self.config.jobs_local), '-c']
+        return None
+
+    def _compress_program(self) -> Optional[List[str]]:
+        """Return the external compressor command for the tarball format, if installed."""
+        if self.config.legacy_gzip:
+            return self._parallel_gzip_command()
+        if shutil.which('zstd'):
+            return ['zstd', '-T0', '-3', '-c']
+        return None
+
+    def _has_gnu_tar(self) -> bool:
+        """Check that tar is GNU tar, which is needed for --transform."""
+        result = self.run_command(['tar', '--version'], check=False)
+        return result.returncode == 0 and 'GNU tar' in result.stdout
+
     def create_tarball(self):
         """Create deployment tarball."""
         self.logger.info("Creating deployment tarball...")
@@ -479,8 +832,6 @@ class KernelBuilder:
                 return None
             return tarinfo
 
-        os.chdir(self.config.linux_dir)
-
         # Verify all required files exist
         required_files = {
                 'kernel': self.config.linux_dir / "arch/arm64/boot/Image",
@@ -499,65 +850,37 @@ class KernelBuilder:
         if self.config.output_tar.exists():
             self.config.output_tar.unlink()
 
-        # Create tarball
-        with tarfile.open(self.config.output_tar, 'w:gz') as tar:
-            # Add kernel image
-            tar.add(
-                    self.config.linux_dir / "arch/arm64/boot/Image",
-                    arcname="arch/arm64/boot/Image"
-                    )
-
-            # Add DTB
-            tar.add(
-                    self.config.dtb_file,
-                    arcname=f"imx8mp-mnt-pocket-reform-{self.config.version}.dtb"
-                    )
-
-            # Add LPC module
-            tar.add(
-                    self.config.build_dir / "reform-tools/lpc/reform2_lpc.ko",
-                    arcname="reform2_lpc.ko"
-                    )
-
-            # Add WiFi module
-            tar.add(
-                    self.config.build_dir / "qcacld2/wlan.ko",
-                    arcname="wlan.ko"
-                    )
-
-            # Add WiFi firmware 
-            tar.add(
-                    self.config.build_dir / "qcacld2/debian-meta/usr",
-                    arcname="usr"
-                    )
-
-            # Add atheros blacklist
-            tar.add(
-                    self.config.build_dir / "qcacld2/debian-meta/etc/modprobe.d/reform-qcacld2.conf",
-                    arcname="etc/modprobe.d/reform-qcacld2.conf"
-                    )
-
-            # Add modules directory
-            tar.add(
-                    self.config.linux_dir / "modules/lib/modules",
-                    arcname="lib/modules",
-                    filter=exclude_build
-                    )
-
-            # Add the config file
-            tar.add(
-                    self.config.config_file,
-                    arcname=f"config-{self.config.version}-mnt-reform-arm64"
-                    )
-
-        dest_path = self.config.build_dir / self.config.output_tar.name
-        if dest_path.exists():
-            dest_path.unlink()
-        self.config.output_tar.rename(dest_path)
-
+        members = self._tarball_members()
+
+        # Create tarball. GNU tar walks the trees in native code and feeds
+        # the compressor through a pipe; tarfile is only the fallback.
+        compressor = self._compress_program()
+        if compressor is not None and self._has_gnu_tar():
+            self.logger.info(f"Archiving with GNU tar, compressing with {' '.join(compressor)}")
+            self._write_tarball_gnu(members, [f"--use-compress-program={' '.join(compressor)}"])
+        elif compressor is not None:
+            # Python walks the trees while the compressor runs in its own process
+            self.logger.info(f"Archiving with tarfile, compressing with {' '.join(compressor)}")
+            self._write_tarball_piped(members, compressor, exclude_build)
+        elif self.config.legacy_gzip:
+            self.logger.info("Compressing with gzip (legacy)")
+            with tarfile.open(self.config.output_tar, 'w:gz') as tar:
+                for path, arcname in members:
+                    tar.add(path, arcname=arcname, filter=exclude_build)
+        elif zstandard is not None:
+            self.logger.info("Compressing with zstandard (all cores)")
+            # threads=-1 uses all cores, like zstd -T0
+            cctx = zstandard.ZstdCompressor(level=3, threads=-1)
+            with open(self.config.output_tar, 'wb') as f, \
+                    cctx.stream_writer(f) as zf, \
+                    tarfile.open(fileobj=zf, mode='w|') as tar:
+                for path, arcname in members:
+                    tar.add(path, arcname=arcname, filter=exclude_build)
+        else:
+            raise BuildError("No zstd compressor found, install zstd or the Python zstandard module")
 
         # Report size
-        size_mb = dest_path.stat().st_size / (1024 * 1024)
+        size_mb = self.config.output_tar.stat().st_size / (1024 * 1024)
         self.logger.info(
                 f"{Colors.GREEN}✓{Colors.RESET} Tarball created: "
                 f"{self.config.output_tar.name} ({size_mb:.1f} MB)"
@@ -566,7 +889,8 @@ class KernelBuilder:
 
 def run_build(version: str = DEFAULT_KERNEL_VERSION, build_dir: Optional[Path] = None,
               jobs: Optional[int] = None, pkgrel: int = DEFAULT_PKGREL,
-              skip_git_operations: bool = False, dry_run: bool = False) -> int:
+              skip_git_operations: bool = False, dry_run: bool = False,
+              legacy_gzip: bool = False, verbose: bool = False, distcc: bool = False) -> int:
     """Run the kernel build process.
     
     Args:
@@ -576,6 +900,9 @@ def run_build(version: str = DEFAULT_KERNEL_VERSION, build_dir: Optional[Path] =
         pkgrel: Package release number
         skip_git_operations: If True, skip git reset/checkout operations
         dry_run: If True, only check prerequisites, do not build
+        legacy_gzip: If True, write a .tar.gz instead of a .tar.zst
+        verbose: If True, echo the kernel compile output to the console
+        distcc: If True, distribute compiles to the hosts in DISTCC_HOSTS
         
     Returns:
         Exit code (0 for success, non-zero for failure)
@@ -585,7 +912,10 @@ def run_build(version: str = DEFAULT_KERNEL_VERSION, build_dir: Optional[Path] =
             version=version,
             build_dir=build_dir,
             jobs=jobs,
-            pkgrel=pkgrel
+            pkgrel=pkgrel,
+            legacy_gzip=legacy_gzip,
+            verbose=verbose,
+            distcc=distcc
             )
 
     # Setup logging
@@ -603,7 +933,9 @@ def run_build(version: str = DEFAULT_KERNEL_VERSION, build_dir: Optional[Path] =
         logger.info(f"Build directory: {config.build_dir}")
         logger.info(f"Patches directory: {config.patches_dir}")
         logger.info(f"Log file: {config.log_file}")
-        logger.info(f"Parallel jobs: {config.jobs}")
+        logger.info(f"Parallel jobs: {config.jobs} (compile: {config.jobs_build}, modules_install: {config.jobs_io})")
+        if config.distcc:
+            logger.info(f"distcc hosts: {os.environ.get('DISTCC_HOSTS', '')}")
         logger.info("=" * 60)
 
         start_time = datetime.now()
@@ -617,8 +949,18 @@ def run_build(version: str = DEFAULT_KERNEL_VERSION, build_dir: Optional[Path] =
 
         # Build everything
         builder.build_kernel(skip_git_operations=skip_git_operations)
-        builder.build_lpc_module()
-        builder.build_qcacld2_module()
+
+        # The out-of-tree modules only need the built kernel tree, not the
+        # installed modules, so all three steps can run at the same time
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            steps = [
+                    pool.submit(builder.install_modules),
+                    pool.submit(builder.build_lpc_module),
+                    pool.submit(builder.build_qcacld2_module)
+                    ]
+            for step in steps:
+                step.result()
+
         builder.create_tarball()
 
         # Summary
@@ -641,6 +983,8 @@ def run_build(version: str = DEFAULT_KERNEL_VERSION, build_dir: Optional[Path] =
     except Exception as e:
         logger.exception(f"Unexpected error: {e}")
         return 1
+    finally:
+        builder.close()
 
 
 def main():
@@ -676,6 +1020,21 @@ def main():
             action='store_true',
             help='Check prerequisites only, do not build'
             )
+    parser.add_argument(
+            '--legacy-gzip',
+            action='store_true',
+            help='Write a .tar.gz instead of a zstd compressed .tar.zst'
+            )
+    parser.add_argument(
+            '--distcc',
+            action='store_true',
+            help='Distribute compiles with distcc to DISTCC_HOSTS (default jobs: total host slots)'
+            )
+    parser.add_argument(
+            '-v', '--verbose',
+            action='store_true',
+            help='Echo the kernel compile output to the console (it is always in the log file)'
+            )
     parser.add_argument(
             '--version',
             action='version',
@@ -691,7 +1050,10 @@ def main():
             jobs=args.jobs,
             pkgrel=args.pkgrel,
             skip_git_operations=False,
-            dry_run=args.dry_run
+            dry_run=args.dry_run,
+            legacy_gzip=args.legacy_gzip,
+            verbose=args.verbose,
+            distcc=args.distcc
             )
 
 
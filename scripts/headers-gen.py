@@ -1,15 +1,27 @@
 #!/usr/bin/env python3
 
+import errno
+import fcntl
+import io
+import itertools
 import logging
 import os
+import re
 import sys
 import shutil
+import stat
 import subprocess
 import tarfile
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+# Share the affinity-aware CPU count with build.py
+from build import usable_cpus
+
 ARCH = "arm64"
 CROSS_COMPILE = "aarch64-linux-gnu-"
 
@@ -21,6 +33,31 @@ DIRS_TO_COPY = [
     "tools/objtool", 
 ]
 
+# Built once, the Kconfig walk checks every directory against it
+_PRUNE_DIRS = frozenset(DIRS_TO_COPY)
+
+# Host build leftovers in the copied trees that out-of-tree module builds don't use
+_SKIP_NAMES = frozenset(["__pycache__"])
+_SKIP_SUFFIXES = (".pyc",)
+_SKIP_OBJECT_DIRS = ("/scripts/", "/tools/objtool/")
+
+# Write the tar stream to the compressor in 1 MiB chunks, not tarfile's 10 KiB
+PIPE_BUFSIZE = 1 << 20
+
+# Files read ahead of the tar writer
+READ_AHEAD = 64
+
+# Small-file copies kept in flight at once
+COPY_IN_FLIGHT = 64
+
+# Tarball suffix for each --compressor choice
+COMPRESSORS = {
+    "gzip": ".tar.gz",
+    "pigz": ".tar.gz",
+    "zstd": ".tar.zst",
+    "xz": ".tar.xz",
+}
+
 FILES_TO_COPY = [
     ".config",
     "Makefile",
@@ -31,6 +68,25 @@ FILES_TO_COPY = [
 
 VERBOSE = False
 
+NUM_JOBS = usable_cpus()
+
+# VERSION, PATCHLEVEL and SUBLEVEL open the top-level kernel Makefile
+_VERSION_RE = re.compile(
+    rb"^VERSION\s*=\s*(\d+).*?^PATCHLEVEL\s*=\s*(\d+).*?^SUBLEVEL\s*=\s*(\d+)",
+    re.S | re.M
+)
+
+# _IOW(0x94, 9, int) from linux/fs.h: clone (reflink) one file into another
+FICLONE = 0x40049409
+
+# Cleared on the first failure so later files skip straight to the next method
+_reflink_ok = True
+_hardlink_ok = True
+_copy_range_ok = hasattr(os, "copy_file_range")
+
+# Staging directories already created, to skip repeat mkdir syscalls
+_created_dirs: set[str] = set()
+
 
 # ANSI color codes for terminal output
 class Colors:
@@ -52,9 +108,18 @@ class ColoredFormatter(logging.Formatter):
         logging.CRITICAL: f"{Colors.RED}[CRITICAL]{Colors.RESET} %(asctime)s - %(message)s",
     }
 
+    def __init__(self):
+        super().__init__()
+        # Build one formatter per level up front instead of one per record
+        self._formatters = {
+            level: logging.Formatter(fmt, datefmt='%Y-%m-%d %H:%M:%S')
+            for level, fmt in self.FORMATS.items()
+        }
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt, datefmt='%Y-%m-%d %H:%M:%S')
+        formatter = self._formatters.get(record.levelno)
+        if formatter is None:
+            return super().format(record)
         return formatter.format(record)
 
 
@@ -81,6 +146,14 @@ def setup_logging(log_file: Path) -> logging.Logger:
 
     return logger
 
+def default_compressor() -> str:
+    """Pick the fastest compressor that is installed."""
+    for compressor in ("zstd", "pigz"):
+        if shutil.which(compressor):
+            return compressor
+    return "gzip"
+
+
 def parse_arguments():
     parser = argparse.ArgumentParser(
         description="Package kernel headers for out-of-tree module compilation",
@@ -90,6 +163,7 @@ Examples:
   %(prog)s
   %(prog)s --pkgrel 2
   %(prog)s -p 3 --kpath /path/to/linux
+  %(prog)s --compressor xz
         """
     )
     
@@ -115,6 +189,20 @@ Examples:
         help='Enable verbose output (show all copy operations)'
     )
     
+    parser.add_argument(
+        '-c', '--compressor',
+        choices=list(COMPRESSORS),
+        default=default_compressor(),
+        help='Tarball compressor (default: zstd if installed, else pigz, else gzip)'
+    )
+    
+    parser.add_argument(
+        '-s', '--staging',
+        action='store_true',
+        help='Copy into kernel_headers_staging before archiving instead of '
+             'streaming straight from the kernel tree'
+    )
+    
     args = parser.parse_args()
     
     if args.pkgrel < 1:
@@ -123,30 +211,26 @@ Examples:
     return args
 
 def read_kernel_release(src: Path) -> str:
-    major = minor = patch = None
     mf = src / "Makefile"
 
-    if not mf.exists():
+    # The version lines sit in the first few lines, one read covers them
+    try:
+        fd = os.open(mf, os.O_RDONLY)
+    except FileNotFoundError:
         raise SystemExit(f"ERROR: Kernel Makefile not found: {mf}")
+    try:
+        head = os.read(fd, 2048)
+    finally:
+        os.close(fd)
 
-    with mf.open() as f:
-        for line in f:
-            if line.startswith("VERSION ="):
-                major = line.split("=")[1].strip()
-            elif line.startswith("PATCHLEVEL ="):
-                minor = line.split("=")[1].strip()
-            elif line.startswith("SUBLEVEL ="):
-                patch = line.split("=")[1].strip()
-
-            if major is not None and minor is not None and patch is not None:
-                break
-
-    if major is None or minor is None or patch is None:
+    match = _VERSION_RE.search(head)
+    if match is None:
         raise SystemExit(
             f"ERROR: Could not parse kernel version from {mf}. "
-            f"Found: VERSION={major}, PATCHLEVEL={minor}, SUBLEVEL={patch}"
+            f"Expected VERSION, PATCHLEVEL and SUBLEVEL in its first 2 KiB"
         )
 
+    major, minor, patch = (group.decode() for group in match.groups())
     return f"{major}.{minor}.{patch}"
 
 def prepare_kernel_headers(src: Path, logger: logging.Logger):
@@ -155,36 +239,150 @@ def prepare_kernel_headers(src: Path, logger: logging.Logger):
     env["ARCH"] = ARCH
     env["CROSS_COMPILE"] = CROSS_COMPILE
     
-    num_jobs = os.cpu_count() or 1
-    
-    logger.info(f"Running 'make prepare' with ARCH={ARCH} CROSS_COMPILE={CROSS_COMPILE} -j{num_jobs}")
-    result = subprocess.run(
-        ["make", f"-j{num_jobs}", "prepare"],
-        cwd=src,
-        env=env,
-        capture_output=True,
-        text=True
-    )
-    if result.returncode != 0:
-        logger.error(f"STDOUT: {result.stdout}")
-        logger.error(f"STDERR: {result.stderr}")
-        raise SystemExit(f"ERROR: 'make prepare' failed with exit code {result.returncode}")
-    
-    logger.info(f"Running 'make modules_prepare' with ARCH={ARCH} CROSS_COMPILE={CROSS_COMPILE} -j{num_jobs}")
-    result = subprocess.run(
-        ["make", f"-j{num_jobs}", "modules_prepare"],
-        cwd=src,
-        env=env,
-        capture_output=True,
-        text=True
-    )
+    # One make invocation so both targets share a single tree walk and job server
+    logger.info(f"Running 'make prepare modules_prepare' with ARCH={ARCH} CROSS_COMPILE={CROSS_COMPILE} -j{NUM_JOBS}")
+    # Send make's output straight to the log file rather than through Python
+    file_handler = next(h for h in logger.handlers if isinstance(h, logging.FileHandler))
+    file_handler.flush()
+    with open(file_handler.baseFilename, "ab") as logf:
+        result = subprocess.run(
+            ["make", f"-j{NUM_JOBS}", "prepare", "modules_prepare"],
+            cwd=src,
+            env=env,
+            stdout=logf,
+            stderr=subprocess.STDOUT
+        )
+
     if result.returncode != 0:
-        logger.error(f"STDOUT: {result.stdout}")
-        logger.error(f"STDERR: {result.stderr}")
-        raise SystemExit(f"ERROR: 'make modules_prepare' failed with exit code {result.returncode}")
+        logger.error(f"See {file_handler.baseFilename} for the make output")
+        raise SystemExit(f"ERROR: 'make prepare modules_prepare' failed with exit code {result.returncode}")
     
     logger.info(f"{Colors.GREEN}✓{Colors.RESET} Kernel headers prepared successfully")
 
+def _ensure_dir(path: str):
+    """os.makedirs(path, exist_ok=True), once per path."""
+    if path in _created_dirs:
+        return
+    os.makedirs(path, exist_ok=True)
+    _created_dirs.add(path)
+
+
+def _kcopy(src, dst, st=None):
+    """Copy a file with copy_file_range so the data never passes through userspace."""
+    if st is None:
+        st = os.stat(src)
+    sfd = os.open(src, os.O_RDONLY)
+    try:
+        dfd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            while os.copy_file_range(sfd, dfd, 1 << 30):
+                pass
+            os.fchmod(dfd, st.st_mode & 0o7777)
+        finally:
+            os.close(dfd)
+    finally:
+        os.close(sfd)
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return dst
+
+
+def _fast_copy(src, dst, st=None):
+    """Copy a file by reflink, then hardlink, then copy_file_range, falling back to shutil.copy2.
+
+    Hardlinks are safe because the staging directory is only read back by tar.
+    Pass st when the caller already has the source's stat result.
+    """
+    global _reflink_ok, _hardlink_ok, _copy_range_ok
+
+    if _reflink_ok:
+        try:
+            if st is None:
+                st = os.stat(src)
+            # 'xb' so an existing hardlink into the kernel tree is never truncated
+            with open(src, "rb") as fsrc, open(dst, "xb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                os.fchmod(fdst.fileno(), st.st_mode & 0o7777)
+            os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+            return dst
+        except OSError as e:
+            if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV):
+                _reflink_ok = False
+            if e.errno != errno.EEXIST:
+                try:
+                    os.unlink(dst)
+                except FileNotFoundError:
+                    pass
+
+    if _hardlink_ok:
+        try:
+            os.link(src, dst)
+            return dst
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                _hardlink_ok = False
+
+    if _copy_range_ok:
+        try:
+            return _kcopy(src, dst, st)
+        except OSError as e:
+            # Cross-filesystem copies need Linux 5.3+
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL):
+                raise
+            _copy_range_ok = False
+            try:
+                os.unlink(dst)
+            except FileNotFoundError:
+                pass
+
+    return shutil.copy2(src, dst)
+
+
+def _fast_copytree(src: Path, dst: Path):
+    """Copy a directory tree with _fast_copy, spreading the files over a thread pool.
+
+    os.scandir entries are stat'ed once and that result supplies each copy's
+    mode and times, instead of copytree stat'ing again for every copy2.
+    """
+    dirs = []
+    with ThreadPoolExecutor(max_workers=NUM_JOBS) as pool:
+        futures = []
+        pending = [(os.fspath(src), os.fspath(dst), os.stat(src))]
+        while pending:
+            src_dir, dst_dir, dir_st = pending.pop()
+            _ensure_dir(dst_dir)
+            dirs.append((dst_dir, dir_st))
+
+            with os.scandir(src_dir) as it:
+                for entry in it:
+                    d = os.path.join(dst_dir, entry.name)
+                    if entry.is_symlink():
+                        os.symlink(os.readlink(entry.path), d)
+                    elif entry.is_dir(follow_symlinks=False):
+                        pending.append((entry.path, d, entry.stat(follow_symlinks=False)))
+                    else:
+                        futures.append(pool.submit(_fast_copy, entry.path, d, entry.stat(follow_symlinks=False)))
+
+        for future in futures:
+            future.result()
+
+    # Directory modes and times last, children before parents
+    for d, st in reversed(dirs):
+        os.chmod(d, st.st_mode & 0o7777)
+        os.utime(d, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _copy_many(pairs):
+    """_fast_copy (src, dst) pairs with up to COPY_IN_FLIGHT copies outstanding."""
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=COPY_IN_FLIGHT) as pool:
+        for s, d in pairs:
+            if len(in_flight) == COPY_IN_FLIGHT:
+                in_flight.popleft().result()
+            in_flight.append(pool.submit(_fast_copy, s, d))
+        for future in in_flight:
+            future.result()
+
+
 def copy_selected(src: Path, dst: Path, relative: str, logger: logging.Logger):
     s = src / relative
     d = dst / relative
@@ -195,36 +393,217 @@ def copy_selected(src: Path, dst: Path, relative: str, logger: logging.Logger):
     if VERBOSE:
         logger.debug(f"Copying {s} → {d}")
     if s.is_dir():
-        shutil.copytree(s, d, symlinks=True)
+        _fast_copytree(s, d)
     else:
-        d.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(s, d)
+        _ensure_dir(os.fspath(d.parent))
+        _fast_copy(s, d)
+
+
+def _scan_kconfig(src: Path, top: str) -> list[str]:
+    """Collect Kconfig* files below one top-level directory of src."""
+    found = []
+    src_len = len(str(src)) + 1
+    for root, dirs, files in os.walk(src / top):
+        prefix = root[src_len:] + "/"
+        # Prune directories we're copying wholesale before os.walk descends
+        dirs[:] = [d for d in dirs if prefix + d not in _PRUNE_DIRS]
+        for name in files:
+            if name.startswith("Kconfig"):
+                found.append(prefix + name)
+    return found
+
+
+def find_kconfig_files(src: Path) -> list[str]:
+    """Return all Kconfig* files outside DIRS_TO_COPY, relative to src.
+
+    Each top-level directory is scanned as a separate job on a thread pool,
+    the walk is latency bound rather than CPU bound.
+    """
+    found = []
+    tops = []
+    with os.scandir(src) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in _PRUNE_DIRS:
+                    tops.append(entry.name)
+            # The top-level Kconfig is already in FILES_TO_COPY
+            elif entry.name.startswith("Kconfig") and entry.name not in FILES_TO_COPY:
+                found.append(entry.name)
+
+    with ThreadPoolExecutor(max_workers=2 * NUM_JOBS) as pool:
+        for result in pool.map(lambda top: _scan_kconfig(src, top), tops):
+            found.extend(result)
+
+    found.sort()
+    return found
 
 
 def copy_kconfig_files(src: Path, dst: Path, logger: logging.Logger):
     """Copy all Kconfig* files throughout the tree."""
     if VERBOSE:
         logger.info("Copying all Kconfig files")
-    for kconfig in src.rglob("Kconfig*"):
-        # Skip Kconfig files in directories we're already copying wholesale
-        rel_path = kconfig.relative_to(src)
-        
-        # Skip if already in a directory we're copying
-        skip = False
-        for dir_to_copy in DIRS_TO_COPY:
-            if str(rel_path).startswith(dir_to_copy + "/") or str(rel_path) == dir_to_copy:
-                skip = True
-                break
-        
-        if skip:
-            continue
-            
-        dst_kconfig = dst / rel_path
-        dst_kconfig.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(kconfig, dst_kconfig)
+    # Plain strings in the loop, thousands of Path objects add up
+    src_str = os.fspath(src)
+    dst_str = os.fspath(dst)
+    pairs = []
+    for rel_path in find_kconfig_files(src):
+        kconfig = os.path.join(src_str, rel_path)
+        dst_kconfig = os.path.join(dst_str, rel_path)
+        _ensure_dir(os.path.dirname(dst_kconfig))
+        pairs.append((kconfig, dst_kconfig))
         if VERBOSE:
             logger.debug(f"Copying {kconfig} → {dst_kconfig}")
 
+    # Thousands of tiny files, so keep many copies in flight rather than one
+    _copy_many(pairs)
+
+
+def _skip_member(arcname: str, name: str) -> bool:
+    """Whether to leave a file or directory out of the tarball.
+
+    Only drops Python caches and the host objects from building scripts/ and
+    objtool. The .c sources stay, the target rebuilds those tools natively.
+    """
+    if name in _SKIP_NAMES or name.endswith(_SKIP_SUFFIXES):
+        return True
+    return name.endswith(".o") and any(d in arcname for d in _SKIP_OBJECT_DIRS)
+
+
+def _walk_members(path, arcname: str):
+    """Yield (path, arcname) for path and everything below it, in tar.add() order."""
+    # Explicit stack instead of nested generators, children popped in sorted order
+    pending = [(os.fspath(path), arcname)]
+    while pending:
+        path, arcname = pending.pop()
+        yield path, arcname
+        if stat.S_ISDIR(os.lstat(path).st_mode):
+            for name in sorted(os.listdir(path), reverse=True):
+                child = f"{arcname}/{name}"
+                # Pruned here rather than with a tar filter so they're never read
+                if not _skip_member(child, name):
+                    pending.append((os.path.join(path, name), child))
+
+
+def _read_regular(path):
+    """Return the contents of a regular file, None for anything else."""
+    if not stat.S_ISREG(os.lstat(path).st_mode):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def add_members(tar: tarfile.TarFile, members):
+    """Add (path, arcname) pairs to the tarball, reading file contents on a thread pool.
+
+    Up to READ_AHEAD files are read ahead while this thread writes the tar
+    stream. TarInfo headers are still built here and in order, so hardlink
+    detection and member order match tar.add().
+    """
+    members = iter(members)
+    window = deque()
+    with ThreadPoolExecutor(max_workers=NUM_JOBS) as pool:
+        def fill():
+            for path, arcname in itertools.islice(members, READ_AHEAD - len(window)):
+                window.append((path, arcname, pool.submit(_read_regular, path)))
+
+        fill()
+        while window:
+            path, arcname, future = window.popleft()
+            fill()
+            tarinfo = tar.gettarinfo(path, arcname)
+            data = future.result()
+            if tarinfo.isreg():
+                tar.addfile(tarinfo, io.BytesIO(data))
+            else:
+                tar.addfile(tarinfo)
+
+
+def _with_parents(members, src: Path, arcroot: str, added: set):
+    """Yield members, each preceded by any parent directory not yet in the tarball.
+
+    Gives paths like tools/ and drivers/net/, which only have selected files
+    below them, the same directory entries the staging copy produces.
+    """
+    src_str = os.fspath(src)
+    for path, arcname in members:
+        missing = []
+        parent = os.path.dirname(arcname)
+        while parent not in added and parent != arcroot:
+            missing.append(parent)
+            parent = os.path.dirname(parent)
+        for parent in reversed(missing):
+            added.add(parent)
+            yield os.path.join(src_str, parent[len(arcroot) + 1:]), parent
+        added.add(arcname)
+        yield path, arcname
+
+
+def add_selected(tar: tarfile.TarFile, src: Path, arcroot: str, relative: str, logger: logging.Logger,
+                 added: set):
+    """Add a file or directory from the kernel tree straight into the tarball.
+
+    added holds the arcnames already in the tarball, missing parents get added.
+    """
+    s = src / relative
+    if not s.exists():
+        if VERBOSE:
+            logger.warning(f"Skipping missing {s}")
+        return
+    if VERBOSE:
+        logger.debug(f"Adding {s} → {arcroot}/{relative}")
+    # Symlinks are stored as links, matching copytree(symlinks=True)
+    add_members(tar, _with_parents(_walk_members(s, f"{arcroot}/{relative}"), src, arcroot, added))
+
+
+def add_kconfig_files(tar: tarfile.TarFile, src: Path, arcroot: str, logger: logging.Logger, added: set):
+    """Add all Kconfig* files throughout the tree straight into the tarball."""
+    if VERBOSE:
+        logger.info("Adding all Kconfig files")
+    src_str = os.fspath(src)
+    kconfigs = find_kconfig_files(src)
+    if VERBOSE:
+        for rel_path in kconfigs:
+            logger.debug(f"Adding {src_str}/{rel_path} → {arcroot}/{rel_path}")
+    members = ((os.path.join(src_str, rel_path), f"{arcroot}/{rel_path}") for rel_path in kconfigs)
+    add_members(tar, _with_parents(members, src, arcroot, added))
+
+
+def compressor_command(compressor: str) -> list[str] | None:
+    """Return the argv that compresses stdin to stdout, or None for in-process gzip."""
+    if compressor == "gzip":
+        return None
+    if shutil.which(compressor) is None:
+        raise SystemExit(f"ERROR: Compressor not found in PATH: {compressor}")
+    if compressor == "pigz":
+        return ["pigz", "-p", str(NUM_JOBS), "-c"]
+    # Level 3 is plenty for an artifact that is extracted once
+    return [compressor, f"-T{NUM_JOBS}", "-3", "-c"]
+
+
+@contextmanager
+def open_tarball(output: Path, compressor: str, logger: logging.Logger):
+    """Open a tarball for streaming writes through the chosen compressor."""
+    cmd = compressor_command(compressor)
+    if cmd is None:
+        logger.info("Compressing with single-threaded gzip")
+        with tarfile.open(output, "w:gz") as tar:
+            yield tar
+        return
+
+    logger.info(f"Compressing with {' '.join(cmd[:-1])}")
+    with output.open("wb") as out:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=out, bufsize=PIPE_BUFSIZE)
+        try:
+            # 'w|' streams into the pipe without seeking
+            with tarfile.open(fileobj=proc.stdin, mode="w|", bufsize=PIPE_BUFSIZE) as tar:
+                yield tar
+        finally:
+            proc.stdin.close()
+            ret = proc.wait()
+
+    if ret != 0:
+        raise SystemExit(f"ERROR: {compressor} failed with exit code {ret}")
+
 
 def main():
     global VERBOSE
@@ -256,32 +635,51 @@ def main():
 
     prepare_kernel_headers(KERNEL_SRC, logger)
 
-    OUTPUT_TARBALL = Path(f"headers-{version}-{pkgrel}-mnt.tar.gz")
-    staging_dir = Path("kernel_headers_staging")
+    OUTPUT_TARBALL = Path(f"headers-{version}-{pkgrel}-mnt{COMPRESSORS[args.compressor]}")
+    arcroot = f"linux-{version}"
 
-    if staging_dir.exists():
-        shutil.rmtree(staging_dir)
-    staging_dir.mkdir()
+    if args.staging:
+        staging_dir = Path("kernel_headers_staging")
 
-    logger.info("Copying required directories")
-    for d in DIRS_TO_COPY:
-        copy_selected(KERNEL_SRC, staging_dir, d, logger)
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+        staging_dir.mkdir()
 
-    logger.info("Copying required files")
-    for f in FILES_TO_COPY:
-        copy_selected(KERNEL_SRC, staging_dir, f, logger)
+        logger.info("Copying required directories")
+        for d in DIRS_TO_COPY:
+            copy_selected(KERNEL_SRC, staging_dir, d, logger)
 
-    copy_kconfig_files(KERNEL_SRC, staging_dir, logger)
+        logger.info("Copying required files")
+        for f in FILES_TO_COPY:
+            copy_selected(KERNEL_SRC, staging_dir, f, logger)
 
-    logger.info(f"Creating tarball: {OUTPUT_TARBALL}")
-    with tarfile.open(OUTPUT_TARBALL, "w:gz") as tar:
-        tar.add(staging_dir, arcname=f"linux-{version}")
+        copy_kconfig_files(KERNEL_SRC, staging_dir, logger)
+
+        logger.info(f"Creating tarball: {OUTPUT_TARBALL}")
+        with open_tarball(OUTPUT_TARBALL, args.compressor, logger) as tar:
+            add_members(tar, _walk_members(staging_dir, arcroot))
+    else:
+        # Archive straight from the kernel tree, skipping the staging round trip
+        logger.info(f"Creating tarball: {OUTPUT_TARBALL}")
+        with open_tarball(OUTPUT_TARBALL, args.compressor, logger) as tar:
+            tar.add(KERNEL_SRC, arcname=arcroot, recursive=False)
+            added = {arcroot}
+
+            logger.info("Adding required directories")
+            for d in DIRS_TO_COPY:
+                add_selected(tar, KERNEL_SRC, arcroot, d, logger, added)
+
+            logger.info("Adding required files")
+            for f in FILES_TO_COPY:
+                add_selected(tar, KERNEL_SRC, arcroot, f, logger, added)
+
+            add_kconfig_files(tar, KERNEL_SRC, arcroot, logger, added)
 
     logger.info("=" * 60)
     logger.info(f"{Colors.GREEN}✓ Headers generation complete!{Colors.RESET}")
     logger.info(f"Output: {OUTPUT_TARBALL}")
     logger.info(f"Log file: {log_file}")
-    if VERBOSE:
+    if VERBOSE and args.staging:
         logger.info("Staging directory: kernel_headers_staging")
     logger.info("=" * 60)
 
@@ -12,7 +12,7 @@ MOUNTDIR="$WORKDIR/mnt"
 BOOT_MNT="$MOUNTDIR/boot"
 ROOT_MNT="$MOUNTDIR/root"
 
-KERNEL_URL="https://github.com/cetola/mnt-build/releases/download/${KVER}-${PKGREL}-mnt-pocket/kernel-${KVER}-${PKGREL}-mnt.tar.gz"
+KERNEL_URL="https://github.com/cetola/mnt-build/releases/download/${KVER}-${PKGREL}-mnt-pocket/kernel-${KVER}-${PKGREL}-mnt.tar.zst"
 POCKET_URL="https://github.com/cetola/linux-mnt-pocket/archive/refs/tags/${KVER}-${PKGREL}-mnt-pocket.tar.gz"
 ARCH_URL="http://os.archlinuxarm.org/os/ArchLinuxARM-aarch64-latest.tar.gz"
 
@@ -105,7 +105,7 @@ download_if_missing() {
   fi
 }
 
-download_if_missing "$KERNEL_URL" "kernel.tar.gz"
+download_if_missing "$KERNEL_URL" "kernel.tar.zst"
 download_if_missing "$POCKET_URL" "pocket.tar.gz"
 download_if_missing "$ARCH_URL" "archlinuxarm.tar.gz"
 
@@ -114,7 +114,7 @@ tar -xpf archlinuxarm.tar.gz -C "$ROOT_MNT"
 
 echo "Extracting kernel..."
 mkdir -p "$WORKDIR/kernel"
-tar -xpf kernel.tar.gz -C "$WORKDIR/kernel"
+tar -xpf kernel.tar.zst -C "$WORKDIR/kernel"
 
 echo "Extracting linux-mnt-pocket..."
 mkdir -p "$WORKDIR/pocket"